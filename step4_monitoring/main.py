@@ -1,10 +1,8 @@
 import asyncio
+import concurrent.futures
 import sys
 from pathlib import Path
 
-# Добавление src в путь импорта
-sys.path.append(str(Path(__file__).parent / "src"))
-
 from src.config import ConfigLoader
 from src.logger import MonitoringLogger
 from src.monitor import ServiceMonitor
@@ -15,15 +13,26 @@ async def main():
     print("Запуск системы мониторинга FastAPI сервиса")
     print("=" * 50)
     
+    # Ограниченный пул потоков для блокирующей работы (запись файлов, сериализация)
+    pool = concurrent.futures.ThreadPoolExecutor(max_workers=4)
+    asyncio.get_running_loop().set_default_executor(pool)
+    
     try:
         # Загрузка конфигурации
         config = ConfigLoader.load()
         
+        # Тестовое изображение загружается в память один раз при старте
+        test_image_path = Path(config.inference_test.test_image_path)
+        test_image_bytes = None
+        if config.inference_test.enabled and test_image_path.exists():
+            test_image_bytes = test_image_path.read_bytes()
+        
         # Инициализация логгера
         logger = MonitoringLogger(config)
         
-        # Инициализация монитора
-        monitor = ServiceMonitor(config, logger)
+        # Инициализация монитора: общий HTTP/2 клиент с пулом keep-alive соединений
+        # монитор создает сам при первом запросе и закрывает по завершении мониторинга
+        monitor = ServiceMonitor(config, logger, test_image_bytes=test_image_bytes)
         
         # Запуск мониторинга
         await monitor.start_monitoring()
@@ -39,4 +48,11 @@ async def main():
 
 
 if __name__ == "__main__":
+    # uvloop (если установлен) - более быстрый цикл событий на базе libuv
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+    
     asyncio.run(main())
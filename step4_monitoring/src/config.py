@@ -1,90 +1,157 @@
+import asyncio
+import copy
+import json
 import os
-import yaml
-from dataclasses import dataclass, field
-from typing import Dict, List, Optional
+from collections import OrderedDict
+from dataclasses import dataclass, field, fields
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple
 from pathlib import Path
 
 
-@dataclass
+@lru_cache(maxsize=None)
+def _yaml_backend():
+    """Лениво импортирует PyYAML, предпочитая C-реализацию (libyaml) загрузчика и дампера"""
+    import yaml
+    try:
+        from yaml import CSafeLoader as Loader, CSafeDumper as Dumper
+    except ImportError:
+        from yaml import SafeLoader as Loader, SafeDumper as Dumper
+    return yaml, Loader, Dumper
+
+
+# Кэш разобранных YAML файлов: путь -> (mtime_ns, size, данные)
+_YAML_CACHE: "OrderedDict[str, Tuple[int, int, Dict]]" = OrderedDict()
+_YAML_CACHE_MAX_SIZE = 100
+
+
+def _freeze(section, *names):
+    """Делает вложенные словари и списки секции неизменяемыми: frozen защищает только сами поля"""
+    for name in names:
+        value = getattr(section, name)
+        if isinstance(value, dict):
+            object.__setattr__(section, name, MappingProxyType(dict(value)))
+        elif isinstance(value, list):
+            object.__setattr__(section, name, tuple(value))
+
+
+def _thaw(value: Any) -> Any:
+    """Обратное преобразование для сохранения в YAML"""
+    if isinstance(value, Mapping):
+        return {k: _thaw(v) for k, v in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(v) for v in value]
+    return value
+
+
+def _section_dict(section) -> Dict[str, Any]:
+    """Секция конфигурации как обычный словарь (asdict не умеет копировать MappingProxyType)"""
+    return {f.name: _thaw(getattr(section, f.name)) for f in fields(section)}
+
+
+@dataclass(slots=True, frozen=True)
 class ServiceConfig:
     host: str = "localhost"
     port: int = 8000
     base_url: str = "http://localhost:8000"
-    endpoints: Dict[str, str] = field(default_factory=lambda: {
+    endpoints: Mapping[str, str] = field(default_factory=lambda: {
         "health": "/health",
         "predict": "/predict"
     })
+    
+    def __post_init__(self):
+        _freeze(self, 'endpoints')
 
 
-@dataclass
-class MonitoringConfig:
+@dataclass(slots=True, frozen=True)
+class MonitoringIntervalsConfig:
     check_interval_seconds: int = 30
     samples_per_check: int = 3
     request_timeout_seconds: int = 10
     inference_test_interval_minutes: int = 5
+    max_backoff_seconds: int = 300
+    max_parallel: int = 8
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ThresholdsConfig:
-    response_time_ms: Dict[str, float] = field(default_factory=lambda: {
+    response_time_ms: Mapping[str, float] = field(default_factory=lambda: {
         "warning": 2000,
         "critical": 5000
     })
-    p95_latency_ms: Dict[str, float] = field(default_factory=lambda: {
+    p95_latency_ms: Mapping[str, float] = field(default_factory=lambda: {
         "warning": 3000,
         "critical": 6000
     })
-    error_rate_percent: Dict[str, float] = field(default_factory=lambda: {
+    error_rate_percent: Mapping[str, float] = field(default_factory=lambda: {
         "warning": 10,
         "critical": 25
     })
-    consecutive_failures: Dict[str, int] = field(default_factory=lambda: {
+    consecutive_failures: Mapping[str, int] = field(default_factory=lambda: {
         "warning": 3,
         "critical": 5
     })
+    
+    def __post_init__(self):
+        _freeze(self, 'response_time_ms', 'p95_latency_ms', 'error_rate_percent', 'consecutive_failures')
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class AlertsConfig:
     enabled: bool = True
     cooldown_minutes: int = 5
-    notify_on: List[str] = field(default_factory=lambda: [
+    notify_on: Tuple[str, ...] = (
         "response_time",
         "error_rate",
         "consecutive_failures",
         "health_status"
-    ])
+    )
+    
+    def __post_init__(self):
+        _freeze(self, 'notify_on')
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class LoggingConfig:
     console_colors: bool = True
     log_level: str = "INFO"
     log_file: str = "logs/monitoring.log"
     metrics_file: str = "logs/metrics.jsonl"
+    history_file: str = "logs/metrics_history.jsonl"
     max_log_size_mb: int = 10
     backup_count: int = 5
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class InferenceTestConfig:
     enabled: bool = True
     test_image_path: str = "test_images/sample.jpg"
-    expected_fields: List[str] = field(default_factory=lambda: [
-        "filename", "result", "status_code"
-    ])
+    expected_fields: Tuple[str, ...] = ("filename", "result", "status_code")
+    
+    def __post_init__(self):
+        _freeze(self, 'expected_fields')
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class MonitoringConfig:
     service: ServiceConfig
-    monitoring: MonitoringConfig
+    monitoring: MonitoringIntervalsConfig
     thresholds: ThresholdsConfig
     alerts: AlertsConfig
     logging: LoggingConfig
     inference_test: InferenceTestConfig
 
 
+# Секции по умолчанию создаются один раз: dataclass'ы и их вложенные значения неизменяемы и могут разделяться
+_DEFAULT_SERVICE = ServiceConfig()
+_DEFAULT_MONITORING = MonitoringIntervalsConfig()
+_DEFAULT_THRESHOLDS = ThresholdsConfig()
+_DEFAULT_ALERTS = AlertsConfig()
+_DEFAULT_LOGGING = LoggingConfig()
+_DEFAULT_INFERENCE_TEST = InferenceTestConfig()
+
+
 class ConfigLoader:
     @staticmethod
     def load(config_path: str = "config/monitoring_config.yaml") -> MonitoringConfig:
@@ -94,37 +161,103 @@ class ConfigLoader:
         if not config_path.exists():
             raise FileNotFoundError(f"Конфигурационный файл не найден: {config_path}")
         
-        with open(config_path, 'r', encoding='utf-8') as f:
-            config_data = yaml.safe_load(f)
+        config_data = ConfigLoader._read_yaml(config_path)
         
         return ConfigLoader._create_config(config_data)
     
+    @staticmethod
+    def _read_yaml(config_path: Path) -> Dict:
+        """Читает YAML файл, повторно используя результат разбора для неизмененного файла"""
+        key = str(config_path.resolve())
+        stat = config_path.stat()
+        
+        cached = _YAML_CACHE.get(key)
+        if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            _YAML_CACHE.move_to_end(key)
+            # Копия, чтобы изменения вызывающего кода не испортили кэш
+            return copy.deepcopy(cached[2])
+        
+        config_data = ConfigLoader._parse_yaml(config_path, stat)
+        
+        _YAML_CACHE[key] = (stat.st_mtime_ns, stat.st_size, config_data)
+        _YAML_CACHE.move_to_end(key)
+        if len(_YAML_CACHE) > _YAML_CACHE_MAX_SIZE:
+            _YAML_CACHE.popitem(last=False)
+        
+        return copy.deepcopy(config_data)
+    
+    @staticmethod
+    def _parse_yaml(config_path: Path, stat: os.stat_result) -> Dict:
+        """Разбирает YAML файл через JSON-копию рядом с ним, если она сделана с этой же версии файла"""
+        sidecar = config_path.with_suffix(config_path.suffix + '.json')
+        # Как и в _YAML_CACHE, версия файла - (mtime_ns, size); сравнение только на точное совпадение,
+        # т.к. после cp -p/tar/rsync mtime YAML может оказаться старше устаревшей JSON-копии
+        source = [stat.st_mtime_ns, stat.st_size]
+        
+        try:
+            with open(sidecar, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if isinstance(cached, dict) and cached.get('source') == source:
+                return cached['data']
+        except (OSError, ValueError, KeyError):
+            pass
+        
+        yaml, loader, _ = _yaml_backend()
+        with open(config_path, 'r', encoding='utf-8') as f:
+            config_data = yaml.load(f, Loader=loader) or {}
+        
+        # JSON-копия ускоряет следующие запуски; на read-only ФС просто пропускаем
+        try:
+            sidecar.write_text(
+                json.dumps({'source': source, 'data': config_data}, ensure_ascii=False),
+                encoding='utf-8'
+            )
+        except (OSError, TypeError):
+            pass
+        
+        return config_data
+    
     @staticmethod
     def _create_config(data: Dict) -> MonitoringConfig:
         """Создает объект конфигурации из словаря"""
+        service = data.get('service')
+        monitoring = data.get('monitoring')
+        thresholds = data.get('thresholds')
+        alerts = data.get('alerts')
+        logging = data.get('logging')
+        inference_test = data.get('inference_test')
+        
+        # Отсутствующие секции не пересоздаются, а берутся из готовых значений по умолчанию
         return MonitoringConfig(
-            service=ServiceConfig(**data.get('service', {})),
-            monitoring=MonitoringConfig(**data.get('monitoring', {})),
-            thresholds=ThresholdsConfig(**data.get('thresholds', {})),
-            alerts=AlertsConfig(**data.get('alerts', {})),
-            logging=LoggingConfig(**data.get('logging', {})),
-            inference_test=InferenceTestConfig(**data.get('inference_test', {}))
+            service=ServiceConfig(**service) if service else _DEFAULT_SERVICE,
+            monitoring=MonitoringIntervalsConfig(**monitoring) if monitoring else _DEFAULT_MONITORING,
+            thresholds=ThresholdsConfig(**thresholds) if thresholds else _DEFAULT_THRESHOLDS,
+            alerts=AlertsConfig(**alerts) if alerts else _DEFAULT_ALERTS,
+            logging=LoggingConfig(**logging) if logging else _DEFAULT_LOGGING,
+            inference_test=InferenceTestConfig(**inference_test) if inference_test else _DEFAULT_INFERENCE_TEST
         )
     
     @staticmethod
     def save(config: MonitoringConfig, config_path: str = "config/monitoring_config.yaml"):
         """Сохраняет конфигурацию в YAML файл"""
         config_dict = {
-            'service': config.service.__dict__,
-            'monitoring': config.monitoring.__dict__,
-            'thresholds': config.thresholds.__dict__,
-            'alerts': config.alerts.__dict__,
-            'logging': config.logging.__dict__,
-            'inference_test': config.inference_test.__dict__
+            'service': _section_dict(config.service),
+            'monitoring': _section_dict(config.monitoring),
+            'thresholds': _section_dict(config.thresholds),
+            'alerts': _section_dict(config.alerts),
+            'logging': _section_dict(config.logging),
+            'inference_test': _section_dict(config.inference_test)
         }
         
         config_path = Path(config_path)
         config_path.parent.mkdir(parents=True, exist_ok=True)
         
+        yaml, _, dumper = _yaml_backend()
         with open(config_path, 'w', encoding='utf-8') as f:
-            yaml.dump(config_dict, f, default_flow_style=False, allow_unicode=True)
+            yaml.dump(config_dict, f, Dumper=dumper, default_flow_style=False, allow_unicode=True)
+    
+    @staticmethod
+    async def asave(config: MonitoringConfig, config_path: str = "config/monitoring_config.yaml"):
+        """Сохраняет конфигурацию в YAML файл, не блокируя цикл событий"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, ConfigLoader.save, config, config_path)
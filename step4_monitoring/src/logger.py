@@ -1,40 +1,70 @@
-import json
+import asyncio
+import atexit
 import logging
+import os
 import sys
-from datetime import datetime
+import time
+import traceback
 from pathlib import Path
 from typing import Dict, Any, Optional
 from logging.handlers import RotatingFileHandler
-import colorama
-from colorama import Fore, Style
+import orjson
+
+
+# Кэш форматированной секундной части временной метки: (секунда, строка)
+_ts_cache = (0, '')
+
+
+def _iso_now() -> str:
+    """Текущее время UTC в ISO 8601 без создания объектов datetime"""
+    global _ts_cache
+    t = time.time()
+    sec = int(t)
+    cached_sec, prefix = _ts_cache
+    if sec != cached_sec:
+        prefix = time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(sec))
+        _ts_cache = (sec, prefix)
+    return f"{prefix}.{int((t - sec) * 1e6):06d}Z"
 
 
 class ColoredFormatter(logging.Formatter):
     """Форматтер с цветным выводом для консоли"""
     
-    COLORS = {
-        'DEBUG': Fore.CYAN,
-        'INFO': Fore.GREEN,
-        'WARNING': Fore.YELLOW,
-        'ERROR': Fore.RED,
-        'CRITICAL': Fore.RED + Style.BRIGHT
-    }
+    # Заполняются при первом форматировании, чтобы не импортировать colorama заранее
+    COLORS: Optional[Dict[str, str]] = None
+    RESET: Optional[str] = None
     
-    RESET = Style.RESET_ALL
+    @classmethod
+    def _load_colors(cls):
+        from colorama import Fore, Style
+        cls.COLORS = {
+            'DEBUG': Fore.CYAN,
+            'INFO': Fore.GREEN,
+            'WARNING': Fore.YELLOW,
+            'ERROR': Fore.RED,
+            'CRITICAL': Fore.RED + Style.BRIGHT
+        }
+        cls.RESET = Style.RESET_ALL
     
     def format(self, record):
         log_message = super().format(record)
         if hasattr(record, 'color'):
+            if self.RESET is None:
+                self._load_colors()
             return f"{record.color}{log_message}{self.RESET}"
         return log_message
 
 
-class JsonFormatter(logging.Formatter):
-    """Форматтер для вывода логов в JSON формате"""
+class JsonFormatter:
+    """Форматтер для вывода логов в JSON формате
+    
+    Не наследует logging.Formatter: строковые шаблоны и asctime здесь не нужны,
+    поэтому запись собирается напрямую.
+    """
     
     def format(self, record):
         log_object = {
-            'timestamp': datetime.utcnow().isoformat() + 'Z',
+            'timestamp': _iso_now(),
             'level': record.levelname,
             'message': record.getMessage(),
             'module': record.module,
@@ -46,24 +76,125 @@ class JsonFormatter(logging.Formatter):
             log_object.update(record.extra)
         
         if record.exc_info:
-            log_object['exception'] = self.formatException(record.exc_info)
+            log_object['exception'] = ''.join(
+                traceback.format_exception(*record.exc_info)
+            ).rstrip('\n')
         
-        return json.dumps(log_object, ensure_ascii=False)
+        return orjson.dumps(log_object).decode()
+
+
+class _BufferedFileMixin:
+    """Буферизованная запись в файл: сброс на диск по таймеру или для ERROR и выше"""
+    
+    buffer_size = 64 * 1024
+    
+    def _open(self):
+        return open(self.baseFilename, self.mode, buffering=self.buffer_size,
+                    encoding=self.encoding, errors=self.errors)
+    
+    def emit(self, record):
+        # StreamHandler.emit вызывает flush() после каждой записи - откладываем его
+        self._defer_flush = record.levelno < logging.ERROR
+        try:
+            super().emit(record)
+        finally:
+            self._defer_flush = False
+    
+    def flush(self):
+        with self.lock:
+            if getattr(self, '_defer_flush', False):
+                return
+            super().flush()
+
+
+class BufferedRotatingFileHandler(_BufferedFileMixin, RotatingFileHandler):
+    """RotatingFileHandler с буферизованной записью"""
+    
+    def _open(self):
+        stream = super()._open()
+        # Ротация только для обычных файлов (как в stdlib, bpo-45401): /dev/stdout, FIFO и т.п. не переименовываем
+        self._is_regular = os.path.isfile(self.baseFilename)
+        self._size = os.path.getsize(self.baseFilename) if self._is_regular else 0
+        return stream
+    
+    def shouldRollover(self, record):
+        # Размер файла считаем сами: seek()/tell() сбросили бы буфер на каждой записи
+        if self.stream is None:
+            self.stream = self._open()
+        if self.maxBytes > 0 and self._is_regular:
+            msg = "%s\n" % self.format(record)
+            size = len(msg.encode(self.encoding or 'utf-8'))
+            self._pending_size = size
+            # Пустой файл не ротируем, даже если одна запись больше maxBytes
+            if self._size and self._size + size >= self.maxBytes:
+                return True
+            self._size += size
+        return False
+    
+    def doRollover(self):
+        super().doRollover()
+        # Запись, вызвавшая ротацию, попадет уже в новый файл
+        self._size += self._pending_size
 
 
 class MonitoringLogger:
     """Кастомный логгер для системы мониторинга"""
     
+    FLUSH_INTERVAL_SECONDS = 30
+    METRIC_QUEUE_SIZE = 10_000
+    METRIC_BATCH_SIZE = 256
+    
     def __init__(self, config):
         self.config = config
         self.logger = logging.getLogger('monitoring')
         self.logger.setLevel(getattr(logging, config.logging.log_level))
+        self._level_methods = {
+            'DEBUG': (logging.DEBUG, self.logger.debug),
+            'INFO': (logging.INFO, self.logger.info),
+            'WARNING': (logging.WARNING, self.logger.warning),
+            'ERROR': (logging.ERROR, self.logger.error),
+            'CRITICAL': (logging.CRITICAL, self.logger.critical)
+        }
         
-        # Инициализация colorama для Windows
-        colorama.init()
+        # Цвета имеют смысл только для терминала; в CI/docker/systemd выводим без ANSI-кодов
+        self._use_color = config.logging.console_colors and sys.stdout.isatty()
+        
+        self._setup_colors()
         
+        self._file_handlers = []
         self._setup_handlers()
         self._setup_metrics_logger()
+        
+        # Фоновые задачи: запись метрик и периодический сброс файловых буферов
+        atexit.register(self._shutdown)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._flush_task = self._drain_task = None
+        else:
+            self._flush_task = loop.create_task(self._periodic_flush())
+            self._drain_task = loop.create_task(self._drain_metrics())
+    
+    def flush(self):
+        """Сбрасывает буферы файловых обработчиков на диск"""
+        for handler in self._file_handlers:
+            handler.flush()
+        self._metrics_fp.flush()
+    
+    def _shutdown(self):
+        """Дописывает оставшиеся в очереди метрики и сбрасывает буферы"""
+        items = []
+        while not self._metric_queue.empty():
+            items.append(self._metric_queue.get_nowait())
+        if items:
+            self._write_metrics(items)
+        self.flush()
+    
+    async def _periodic_flush(self):
+        """Фоновый сброс буферов каждые FLUSH_INTERVAL_SECONDS секунд"""
+        while True:
+            await asyncio.sleep(self.FLUSH_INTERVAL_SECONDS)
+            self.flush()
     
     def _setup_handlers(self):
         """Настройка обработчиков логов"""
@@ -71,7 +202,8 @@ class MonitoringLogger:
         
         # Консольный обработчик с цветами
         console_handler = logging.StreamHandler(sys.stdout)
-        console_formatter = ColoredFormatter(
+        formatter_class = ColoredFormatter if self._use_color else logging.Formatter
+        console_formatter = formatter_class(
             '%(asctime)s - %(levelname)s - %(message)s',
             datefmt='%Y-%m-%d %H:%M:%S'
         )
@@ -82,7 +214,7 @@ class MonitoringLogger:
         log_file = Path(self.config.logging.log_file)
         log_file.parent.mkdir(parents=True, exist_ok=True)
         
-        file_handler = RotatingFileHandler(
+        file_handler = BufferedRotatingFileHandler(
             log_file,
             maxBytes=self.config.logging.max_log_size_mb * 1024 * 1024,
             backupCount=self.config.logging.backup_count,
@@ -91,93 +223,145 @@ class MonitoringLogger:
         json_formatter = JsonFormatter()
         file_handler.setFormatter(json_formatter)
         self.logger.addHandler(file_handler)
+        self._file_handlers.append(file_handler)
     
     def _setup_metrics_logger(self):
-        """Настройка логгера для метрик"""
-        self.metrics_logger = logging.getLogger('metrics')
-        self.metrics_logger.setLevel(logging.INFO)
-        self.metrics_logger.handlers.clear()
-        
+        """Настройка записи метрик: очередь и единственный писатель JSONL файла"""
         metrics_file = Path(self.config.logging.metrics_file)
         metrics_file.parent.mkdir(parents=True, exist_ok=True)
         
-        metrics_handler = logging.FileHandler(
-            metrics_file,
-            encoding='utf-8'
-        )
-        metrics_handler.setFormatter(logging.Formatter('%(message)s'))
-        self.metrics_logger.addHandler(metrics_handler)
+        self._metrics_fp = open(metrics_file, 'ab', buffering=_BufferedFileMixin.buffer_size)
+        self._metric_queue: asyncio.Queue = asyncio.Queue(maxsize=self.METRIC_QUEUE_SIZE)
+    
+    def _write_metrics(self, items):
+        """Записывает пачку метрик в JSONL файл одним вызовом write()"""
+        self._metrics_fp.write(b''.join(orjson.dumps(item) + b'\n' for item in items))
+    
+    async def _drain_metrics(self):
+        """Фоновая запись метрик из очереди пачками до METRIC_BATCH_SIZE"""
+        loop = asyncio.get_running_loop()
+        queue = self._metric_queue
+        while True:
+            items = [await queue.get()]
+            while not queue.empty() and len(items) < self.METRIC_BATCH_SIZE:
+                items.append(queue.get_nowait())
+            await loop.run_in_executor(None, self._write_metrics, items)
+    
+    def _setup_colors(self):
+        """Импорт colorama и таблица цветов - только если цветной вывод включен"""
+        self._color_wrap: Dict[str, tuple] = {}
+        self._default_color_wrap = ('', '')
+        
+        if not self._use_color:
+            return
+        
+        import colorama
+        from colorama import Fore, Style
+        
+        # Инициализация colorama для Windows
+        colorama.init()
+        
+        # Префикс и суффикс цветного вывода по уровню логирования
+        self._color_wrap = {
+            'SUCCESS': (Fore.GREEN, Style.RESET_ALL),
+            'INFO': (Fore.BLUE, Style.RESET_ALL),
+            'WARNING': (Fore.YELLOW, Style.RESET_ALL),
+            'ERROR': (Fore.RED, Style.RESET_ALL),
+            'CRITICAL': (Fore.RED + Style.BRIGHT, Style.RESET_ALL),
+            'DEBUG': (Fore.CYAN, Style.RESET_ALL)
+        }
+        self._default_color_wrap = (Fore.RESET, Style.RESET_ALL)
     
     def _add_color(self, level: str, message: str) -> str:
         """Добавляет цвет к сообщению"""
-        if not self.config.logging.console_colors:
+        if not self._use_color:
             return message
         
-        colors = {
-            'SUCCESS': Fore.GREEN,
-            'INFO': Fore.BLUE,
-            'WARNING': Fore.YELLOW,
-            'ERROR': Fore.RED,
-            'CRITICAL': Fore.RED + Style.BRIGHT,
-            'DEBUG': Fore.CYAN
-        }
-        
-        color = colors.get(level.upper(), Fore.RESET)
-        return f"{color}{message}{Style.RESET_ALL}"
+        prefix, suffix = self._color_wrap.get(level.upper(), self._default_color_wrap)
+        return prefix + message + suffix
     
-    def log(self, level: str, message: str, extra: Optional[Dict] = None):
-        """Основной метод логирования"""
-        colored_message = self._add_color(level, message)
+    def log(self, level: str, message: str, *args, extra: Optional[Dict] = None):
+        """Основной метод логирования (args подставляются в message через %, только если запись не отфильтрована)"""
+        level_method = self._level_methods.get(level)
+        if level_method is None:
+            level_method = self._level_methods.get(level.upper(), self._level_methods['INFO'])
         
-        log_method = getattr(self.logger, level.lower(), self.logger.info)
+        levelno, log_method = level_method
+        if not self.logger.isEnabledFor(levelno):
+            return
+        
+        message = self._add_color(level, message)
         
         if extra:
-            log_method(colored_message, extra=extra)
+            log_method(message, *args, extra=extra)
         else:
-            log_method(colored_message)
+            log_method(message, *args)
     
-    def info(self, message: str, extra: Optional[Dict] = None):
+    def info(self, message: str, *args, extra: Optional[Dict] = None):
         """Информационное сообщение"""
-        self.log('INFO', message, extra)
+        self.log('INFO', message, *args, extra=extra)
     
-    def warning(self, message: str, extra: Optional[Dict] = None):
+    def warning(self, message: str, *args, extra: Optional[Dict] = None):
         """Предупреждение"""
-        self.log('WARNING', message, extra)
+        self.log('WARNING', message, *args, extra=extra)
     
-    def error(self, message: str, extra: Optional[Dict] = None):
+    def error(self, message: str, *args, extra: Optional[Dict] = None):
         """Ошибка"""
-        self.log('ERROR', message, extra)
+        self.log('ERROR', message, *args, extra=extra)
     
-    def success(self, message: str, extra: Optional[Dict] = None):
+    def success(self, message: str, *args, extra: Optional[Dict] = None):
         """Успешное выполнение"""
-        self.log('INFO', f"✅ {message}", extra)
+        self.log('INFO', "✅ " + message, *args, extra=extra)
     
-    def critical(self, message: str, extra: Optional[Dict] = None):
+    def critical(self, message: str, *args, extra: Optional[Dict] = None):
         """Критическая ошибка"""
-        self.log('CRITICAL', message, extra)
+        self.log('CRITICAL', message, *args, extra=extra)
     
-    def debug(self, message: str, extra: Optional[Dict] = None):
+    def debug(self, message: str, *args, extra: Optional[Dict] = None):
         """Отладочное сообщение"""
-        self.log('DEBUG', message, extra)
+        self.log('DEBUG', message, *args, extra=extra)
     
-    def log_metric(self, metric_name: str, value: float, 
-                   status: str = "normal", tags: Optional[Dict] = None):
-        """Логирование метрик в JSONL файл"""
-        metric_data = {
-            'timestamp': datetime.utcnow().isoformat() + 'Z',
+    @staticmethod
+    def _metric_record(metric_name: str, value: float, status: str,
+                       tags: Optional[Dict]) -> Dict[str, Any]:
+        """Формирует запись метрики для JSONL файла"""
+        return {
+            'timestamp': _iso_now(),
             'metric': metric_name,
             'value': value,
             'status': status,
             'tags': tags or {}
         }
+    
+    def log_metric(self, metric_name: str, value: float, 
+                   status: str = "normal", tags: Optional[Dict] = None):
+        """Логирование метрик в JSONL файл"""
+        metric_data = self._metric_record(metric_name, value, status, tags)
+        
+        if self._drain_task is None:
+            self._write_metrics([metric_data])
+            return
         
-        self.metrics_logger.info(json.dumps(metric_data, ensure_ascii=False))
+        try:
+            self._metric_queue.put_nowait(metric_data)
+        except asyncio.QueueFull:
+            self._write_metrics([metric_data])
+    
+    async def alog_metric(self, metric_name: str, value: float,
+                          status: str = "normal", tags: Optional[Dict] = None):
+        """Логирование метрик без блокировки цикла событий (запись выполняется в пуле потоков)"""
+        if self._drain_task is None:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self.log_metric, metric_name, value, status, tags)
+            return
+        
+        await self._metric_queue.put(self._metric_record(metric_name, value, status, tags))
     
     def alert(self, alert_type: str, message: str, level: str = "warning",
               value: Optional[float] = None, threshold: Optional[float] = None):
         """Логирование алертов"""
         alert_data = {
-            'timestamp': datetime.utcnow().isoformat() + 'Z',
+            'timestamp': _iso_now(),
             'type': alert_type,
             'level': level.upper(),
             'message': message,
@@ -187,16 +371,20 @@ class MonitoringLogger:
         
         # Цветное отображение в консоли
         if level.upper() == 'CRITICAL':
-            color = Fore.RED + Style.BRIGHT
+            color_name = 'CRITICAL'
             symbol = '🚨'
         elif level.upper() == 'WARNING':
-            color = Fore.YELLOW
+            color_name = 'WARNING'
             symbol = '⚠️'
         else:
-            color = Fore.GREEN
+            color_name = 'SUCCESS'
             symbol = '✅'
         
-        colored_message = f"{symbol} {color}{message}{Style.RESET_ALL}"
+        if self._use_color:
+            prefix, suffix = self._color_wrap[color_name]
+            colored_message = f"{symbol} {prefix}{message}{suffix}"
+        else:
+            colored_message = f"{symbol} {message}"
         self.logger.info(colored_message, extra={'alert': alert_data})
         
         # Сохранение в метрики
@@ -1,16 +1,20 @@
 import asyncio
-import aiohttp
+import httpx
+import numpy as np
+import orjson
+import os
 import time
-import statistics
-from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional, Tuple
-from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Deque, List, Dict, Any, Optional, Tuple
+from collections import deque
+from dataclasses import dataclass, asdict
 from pathlib import Path
 import random
 import json
+import mimetypes
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class RequestMetrics:
     """Метрики запроса"""
     endpoint: str
@@ -20,7 +24,7 @@ class RequestMetrics:
     timestamp: datetime
 
 
-@dataclass
+@dataclass(slots=True)
 class ServiceMetrics:
     """Агрегированные метрики сервиса"""
     timestamp: datetime
@@ -37,27 +41,84 @@ class ServiceMetrics:
 class ServiceMonitor:
     """Монитор FastAPI сервиса"""
     
-    def __init__(self, config, logger):
+    _STATUS_NAMES = ('normal', 'warning', 'critical')
+    HISTORY_FLUSH_CYCLES = 10
+    
+    def __init__(self, config, logger, client: Optional[httpx.AsyncClient] = None,
+                 test_image_bytes: Optional[bytes] = None):
         self.config = config
         self.logger = logger
+        self._log_err, self._log_warn, self._log_info = logger.error, logger.warning, logger.info
+        
+        # HTTP клиент: переданный снаружи или создаваемый при первом запросе
+        self._client = client
+        self._owns_client = False
         self.base_url = config.service.base_url
         self.endpoints = config.service.endpoints
+        self._url_cache = {path: f"{self.base_url}{path}" for path in self.endpoints.values()}
         self.request_timeout = config.monitoring.request_timeout_seconds
         
-        # История запросов
-        self.request_history: List[RequestMetrics] = []
-        self.metrics_history: List[ServiceMetrics] = []
+        # История запросов за последний час: кольцевые буферы фиксированного размера
+        cycles_per_hour = int(3600 / config.monitoring.check_interval_seconds) + 1
+        self.request_history: Deque[RequestMetrics] = deque(
+            maxlen=cycles_per_hour * config.monitoring.samples_per_check
+        )
+        self.metrics_history: Deque[ServiceMetrics] = deque(maxlen=cycles_per_hour)
+        
+        # Полная история метрик на диске: JSONL запись на цикл, сброс каждые HISTORY_FLUSH_CYCLES,
+        # ротация по тем же max_log_size_mb/backup_count, что и у основного лога
+        self._history_path = Path(config.logging.history_file)
+        self._history_path.parent.mkdir(parents=True, exist_ok=True)
+        self._history_max_bytes = config.logging.max_log_size_mb * 1024 * 1024
+        self._history_backups = config.logging.backup_count
+        self._history_fp = open(self._history_path, 'ab')
+        self._history_size = self._history_fp.tell()
+        self._history_pending: List[bytes] = []
         
         # Состояние мониторинга
         self.consecutive_failures = 0
-        self.last_alert_time: Dict[str, datetime] = {}
+        # Время последнего алерта по (тип, уровень) в секундах time.monotonic()
+        self._last_alert: Dict[Tuple[str, str], float] = {}
         self.health_status = False
         
+        # Интервал до следующей проверки по endpoint (экспоненциальный backoff при ошибках)
+        self._base_interval = config.monitoring.check_interval_seconds
+        self._max_backoff = config.monitoring.max_backoff_seconds
+        self._backoff: Dict[str, float] = {}
+        
+        # Пороговые значения и настройки алертов, извлеченные один раз
+        t = config.thresholds
+        self._rt_warn, self._rt_crit = t.response_time_ms['warning'], t.response_time_ms['critical']
+        self._p95_warn, self._p95_crit = t.p95_latency_ms['warning'], t.p95_latency_ms['critical']
+        self._er_warn, self._er_crit = t.error_rate_percent['warning'], t.error_rate_percent['critical']
+        self._cf_warn, self._cf_crit = t.consecutive_failures['warning'], t.consecutive_failures['critical']
+        self._alerts_enabled = config.alerts.enabled
+        self._cooldown_s = config.alerts.cooldown_minutes * 60.0
+        
+        # Времена ответа и успешность запросов текущего цикла (SoA буфер, заполняется monitoring_cycle)
+        self._cap = max(config.monitoring.samples_per_check, 1)
+        self._rt_buf = np.empty(self._cap, dtype=np.float64)
+        self._succ_buf = np.empty(self._cap, dtype=np.bool_)
+        self._filled = 0
+        
+        # Ограничение числа одновременных запросов
+        self._request_semaphore = asyncio.Semaphore(config.monitoring.max_parallel)
+        
         # Тестовое изображение для инференса
         self.test_image_path = Path(config.inference_test.test_image_path)
         
         if not self.test_image_path.exists():
             self._create_sample_image()
+        
+        # Содержимое изображения читается один раз и переиспользуется в каждом запросе
+        self._test_image_mtime = self.test_image_path.stat().st_mtime_ns
+        if test_image_bytes is None:
+            test_image_bytes = self.test_image_path.read_bytes()
+        self.test_image_bytes = test_image_bytes
+        self.test_image_content_type = (
+            mimetypes.guess_type(self.test_image_path.name)[0] or 'application/octet-stream'
+        )
+        self._expected_fields = frozenset(config.inference_test.expected_fields)
     
     def _create_sample_image(self):
         """Создает тестовое изображение если его нет"""
@@ -72,88 +133,170 @@ class ServiceMonitor:
         
         self.logger.info(f"Создано тестовое изображение: {self.test_image_path}")
     
+    def _refresh_test_image(self) -> bool:
+        """Перечитывает тестовое изображение, только если файл изменился
+        
+        Вызывается вне пути запроса, в executor после теста инференса.
+        """
+        try:
+            mtime = self.test_image_path.stat().st_mtime_ns
+            if mtime != self._test_image_mtime:
+                self.test_image_bytes = self.test_image_path.read_bytes()
+                self._test_image_mtime = mtime
+        except OSError:
+            return False
+        return True
+    
+    async def _get_client(self) -> httpx.AsyncClient:
+        """Возвращает общий HTTP клиент, создавая его при первом обращении (единственное место настройки пула)"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                http2=True,
+                limits=httpx.Limits(
+                    max_connections=32,
+                    max_keepalive_connections=16,
+                    keepalive_expiry=60
+                ),
+                timeout=self.request_timeout
+            )
+            self._owns_client = True
+        return self._client
+    
+    def _write_history(self, lines: List[bytes]):
+        """Дописывает пачку записей истории метрик и синхронизирует файл с диском"""
+        rotate = self._history_max_bytes > 0 and self._history_backups > 0
+        chunk: List[bytes] = []
+        for line in lines:
+            # Ротация по записям, чтобы пачка не выводила файл за max_log_size_mb; пустой файл не ротируем
+            if (rotate and self._history_size and
+                    self._history_size + len(line) > self._history_max_bytes):
+                self._history_fp.write(b''.join(chunk))
+                chunk = []
+                self._rotate_history()
+            chunk.append(line)
+            self._history_size += len(line)
+        
+        self._history_fp.write(b''.join(chunk))
+        self._history_fp.flush()
+        os.fsync(self._history_fp.fileno())
+    
+    def _rotate_history(self):
+        """Ротация файла истории: history.jsonl -> .1 -> ... -> .backup_count"""
+        self._history_fp.flush()
+        os.fsync(self._history_fp.fileno())
+        self._history_fp.close()
+        path = self._history_path
+        for i in range(self._history_backups - 1, 0, -1):
+            src = path.with_name(f"{path.name}.{i}")
+            if src.exists():
+                os.replace(src, path.with_name(f"{path.name}.{i + 1}"))
+        os.replace(path, path.with_name(f"{path.name}.1"))
+        
+        self._history_fp = open(path, 'ab')
+        self._history_size = 0
+    
+    async def _persist_metrics(self, metrics: ServiceMetrics):
+        """Добавляет метрики цикла в историю на диске, записывая их пачками в executor"""
+        record = asdict(metrics)
+        # Время в UTC, как и в metrics.jsonl
+        record['timestamp'] = metrics.timestamp.astimezone(timezone.utc)
+        self._history_pending.append(orjson.dumps(record, option=orjson.OPT_UTC_Z) + b'\n')
+        if len(self._history_pending) >= self.HISTORY_FLUSH_CYCLES:
+            lines, self._history_pending = self._history_pending, []
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self._write_history, lines)
+    
+    async def aclose(self):
+        """Дописывает историю метрик и закрывает HTTP клиент, если он был создан монитором"""
+        if not self._history_fp.closed:
+            lines, self._history_pending = self._history_pending, []
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self._write_history, lines)
+            self._history_fp.close()
+        
+        if self._owns_client and self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._owns_client = False
+    
     async def check_health(self) -> Tuple[bool, float]:
         """Проверка health endpoint"""
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         try:
-            async with aiohttp.ClientSession() as session:
-                url = f"{self.base_url}{self.endpoints['health']}"
-                async with session.get(url, timeout=self.request_timeout) as response:
-                    response_time = (time.time() - start_time) * 1000
-                    
-                    if response.status == 200:
-                        data = await response.json()
-                        return True, response_time
-                    else:
-                        self.logger.warning(
-                            f"Health check failed: {response.status}",
-                            extra={'status_code': response.status}
-                        )
-                        return False, response_time
+            client = await self._get_client()
+            response = await client.get(self._url(self.endpoints['health']))
+            response_time = (time.perf_counter() - start_time) * 1000.0
+            
+            if response.status_code == 200:
+                data = orjson.loads(response.content)
+                return True, response_time
+            else:
+                self._log_warn(
+                    "Health check failed: %s", response.status_code,
+                    extra={'status_code': response.status_code}
+                )
+                return False, response_time
         
         except Exception as e:
-            response_time = (time.time() - start_time) * 1000
-            self.logger.error(
-                f"Health check error: {str(e)}",
+            response_time = (time.perf_counter() - start_time) * 1000.0
+            self._log_err(
+                "Health check error: %s", e,
                 extra={'error': str(e)}
             )
             return False, response_time
     
     async def test_inference(self) -> Tuple[bool, float, Optional[Dict]]:
         """Тестирование инференса на /predict endpoint"""
-        start_time = time.time()
-        
-        if not self.test_image_path.exists():
-            self.logger.error(f"Test image not found: {self.test_image_path}")
-            return False, 0, None
+        start_time = time.perf_counter()
         
         try:
-            async with aiohttp.ClientSession() as session:
-                url = f"{self.base_url}{self.endpoints['predict']}"
+            client = await self._get_client()
+            files = {
+                'file': (
+                    self.test_image_path.name,
+                    self.test_image_bytes,
+                    self.test_image_content_type
+                )
+            }
+            
+            response = await client.post(
+                self._url(self.endpoints['predict']),
+                files=files,
+                timeout=self.request_timeout * 2
+            )
+            response_time = (time.perf_counter() - start_time) * 1000.0
+            
+            if response.status_code == 200:
+                result = orjson.loads(response.content)
                 
-                with open(self.test_image_path, 'rb') as f:
-                    data = aiohttp.FormData()
-                    data.add_field('file', f, filename=self.test_image_path.name)
-                    
-                    async with session.post(
-                        url, 
-                        data=data,
-                        timeout=self.request_timeout * 2
-                    ) as response:
-                        response_time = (time.time() - start_time) * 1000
-                        
-                        if response.status == 200:
-                            result = await response.json()
-                            
-                            # Проверка структуры ответа
-                            if all(field in result for field in self.config.inference_test.expected_fields):
-                                self.logger.success(
-                                    f"Inference test passed: {response_time:.2f}ms",
-                                    extra={'response_time': response_time}
-                                )
-                                return True, response_time, result
-                            else:
-                                self.logger.warning(
-                                    f"Inference response missing fields",
-                                    extra={'response': result}
-                                )
-                                return False, response_time, result
-                        else:
-                            error_text = await response.text()
-                            self.logger.error(
-                                f"Inference test failed: {response.status}",
-                                extra={
-                                    'status_code': response.status,
-                                    'error': error_text
-                                }
-                            )
-                            return False, response_time, None
+                # Проверка структуры ответа
+                if self._expected_fields.issubset(result):
+                    self.logger.success(
+                        "Inference test passed: %.2fms", response_time,
+                        extra={'response_time': response_time}
+                    )
+                    return True, response_time, result
+                else:
+                    self._log_warn(
+                        "Inference response missing fields",
+                        extra={'response': result}
+                    )
+                    return False, response_time, result
+            else:
+                self._log_err(
+                    "Inference test failed: %s", response.status_code,
+                    extra={
+                        'status_code': response.status_code,
+                        'error': response.text
+                    }
+                )
+                return False, response_time, None
         
         except Exception as e:
-            response_time = (time.time() - start_time) * 1000
-            self.logger.error(
-                f"Inference test error: {str(e)}",
+            response_time = (time.perf_counter() - start_time) * 1000.0
+            self._log_err(
+                "Inference test error: %s", e,
                 extra={'error': str(e)}
             )
             return False, response_time, None
@@ -161,58 +304,131 @@ class ServiceMonitor:
     async def perform_request(self, endpoint: str, method: str = 'GET', 
                              data: Optional[Dict] = None) -> RequestMetrics:
         """Выполнение HTTP запроса и сбор метрик"""
-        start_time = time.time()
-        
-        try:
-            async with aiohttp.ClientSession() as session:
-                url = f"{self.base_url}{endpoint}"
-                
-                if method.upper() == 'GET':
-                    async with session.get(url, timeout=self.request_timeout) as response:
-                        response_time = (time.time() - start_time) * 1000
-                        success = response.status < 400
-                        
-                        return RequestMetrics(
-                            endpoint=endpoint,
-                            response_time=response_time,
-                            status_code=response.status,
-                            success=success,
-                            timestamp=datetime.now()
-                        )
-                
-                elif method.upper() == 'POST' and data:
-                    async with session.post(url, data=data, timeout=self.request_timeout) as response:
-                        response_time = (time.time() - start_time) * 1000
-                        success = response.status < 400
-                        
-                        return RequestMetrics(
-                            endpoint=endpoint,
-                            response_time=response_time,
-                            status_code=response.status,
-                            success=success,
-                            timestamp=datetime.now()
-                        )
+        timestamp = datetime.now()
+        if method.upper() == 'GET':
+            return await self._perform_get(endpoint, timestamp)
+        elif method.upper() == 'POST' and data:
+            return await self._perform_post(endpoint, data, timestamp)
+    
+    async def _perform_get(self, endpoint: str, timestamp: datetime) -> RequestMetrics:
+        """GET запрос с замером времени ответа (не более max_parallel одновременно)"""
+        async with self._request_semaphore:
+            start_time = time.perf_counter()
+            try:
+                client = await self._get_client()
+                response = await client.get(self._url(endpoint))
+                return self._request_metrics(endpoint, start_time, response.status_code, timestamp)
+            except Exception as e:
+                return self._request_failed(endpoint, start_time, e, timestamp)
+    
+    async def _perform_post(self, endpoint: str, data: Dict, timestamp: datetime) -> RequestMetrics:
+        """POST запрос с замером времени ответа (не более max_parallel одновременно)"""
+        async with self._request_semaphore:
+            start_time = time.perf_counter()
+            try:
+                client = await self._get_client()
+                response = await client.post(self._url(endpoint), data=data)
+                return self._request_metrics(endpoint, start_time, response.status_code, timestamp)
+            except Exception as e:
+                return self._request_failed(endpoint, start_time, e, timestamp)
+    
+    def _url(self, endpoint: str) -> str:
+        """Полный URL endpoint из заранее построенного кэша"""
+        url = self._url_cache.get(endpoint)
+        if url is None:
+            url = self._url_cache[endpoint] = f"{self.base_url}{endpoint}"
+        return url
+    
+    def _request_metrics(self, endpoint: str, start_time: float, status_code: int,
+                         timestamp: datetime) -> RequestMetrics:
+        """Метрики завершенного запроса"""
+        response_time = (time.perf_counter() - start_time) * 1000.0
+        success = status_code < 400
+        
+        return RequestMetrics(
+            endpoint=endpoint,
+            response_time=response_time,
+            status_code=status_code,
+            success=success,
+            timestamp=timestamp
+        )
+    
+    def _request_failed(self, endpoint: str, start_time: float, error: Exception,
+                        timestamp: datetime) -> RequestMetrics:
+        """Метрики запроса, завершившегося исключением"""
+        response_time = (time.perf_counter() - start_time) * 1000.0
+        self._log_err(
+            "Request failed: %s - %s", endpoint, error,
+            extra={'endpoint': endpoint, 'error': str(error)}
+        )
         
-        except Exception as e:
-            response_time = (time.time() - start_time) * 1000
-            self.logger.error(
-                f"Request failed: {endpoint} - {str(e)}",
-                extra={'endpoint': endpoint, 'error': str(e)}
-            )
-            
-            return RequestMetrics(
-                endpoint=endpoint,
-                response_time=response_time,
-                status_code=0,
-                success=False,
-                timestamp=datetime.now()
-            )
+        return RequestMetrics(
+            endpoint=endpoint,
+            response_time=response_time,
+            status_code=0,
+            success=False,
+            timestamp=timestamp
+        )
+    
+    async def _gather_samples(self, probes) -> List[RequestMetrics]:
+        """Параллельное выполнение запросов-сэмплов одного цикла"""
+        results = await asyncio.gather(*probes, return_exceptions=True)
+        return [r for r in results if isinstance(r, RequestMetrics)]
+    
+    def _update_backoff(self, endpoint: str, failed: bool):
+        """Удваивает интервал проверки endpoint при ошибках, сбрасывает при успехе"""
+        if failed:
+            current = self._backoff.get(endpoint, self._base_interval)
+            # Потолок backoff не может сократить паузу ниже обычного интервала проверки
+            self._backoff[endpoint] = max(self._base_interval, min(current * 2, self._max_backoff))
+        else:
+            self._backoff.pop(endpoint, None)
     
-    def calculate_metrics(self, requests: List[RequestMetrics]) -> ServiceMetrics:
-        """Расчет агрегированных метрик"""
-        if not requests:
+    def _next_interval(self, endpoint: str) -> float:
+        """Пауза до следующего цикла с разбросом ±25% во время backoff, но не короче обычного интервала"""
+        backoff = self._backoff.get(endpoint)
+        if backoff is None:
+            return self._base_interval
+        return max(self._base_interval, backoff * random.uniform(0.75, 1.25))
+    
+    def _record_sample(self, response_time: float, success: bool):
+        """Запись результата запроса в буфер цикла; при переполнении буфер удваивается"""
+        filled = self._filled
+        if filled == self._cap:
+            self._cap *= 2
+            self._rt_buf = np.resize(self._rt_buf, self._cap)
+            self._succ_buf = np.resize(self._succ_buf, self._cap)
+        self._rt_buf[filled] = response_time
+        self._succ_buf[filled] = success
+        self._filled = filled + 1
+    
+    def _reset_samples(self):
+        """Очистка буфера перед новым циклом"""
+        self._filled = 0
+    
+    def calculate_metrics(self, requests: List[RequestMetrics],
+                          timestamp: Optional[datetime] = None) -> ServiceMetrics:
+        """Расчет агрегированных метрик по списку запросов"""
+        response_times = np.fromiter((r.response_time for r in requests), dtype=np.float64,
+                                     count=len(requests))
+        success = np.fromiter((r.success for r in requests), dtype=np.bool_, count=len(requests))
+        return self._aggregate(response_times, success, timestamp)
+    
+    def _cycle_metrics(self, timestamp: datetime) -> ServiceMetrics:
+        """Расчет агрегированных метрик по буферу текущего цикла"""
+        filled = self._filled
+        return self._aggregate(self._rt_buf[:filled], self._succ_buf[:filled], timestamp)
+    
+    def _aggregate(self, all_response_times: np.ndarray, success: np.ndarray,
+                   timestamp: Optional[datetime]) -> ServiceMetrics:
+        """Агрегация времен ответа и признаков успешности запросов"""
+        if timestamp is None:
+            timestamp = datetime.now()
+        
+        total_requests = int(all_response_times.size)
+        if not total_requests:
             return ServiceMetrics(
-                timestamp=datetime.now(),
+                timestamp=timestamp,
                 response_time_avg=0,
                 response_time_p95=0,
                 error_rate=100,
@@ -223,27 +439,24 @@ class ServiceMonitor:
                 health_status=self.health_status
             )
         
-        response_times = [r.response_time for r in requests if r.success]
-        successful_requests = [r for r in requests if r.success]
-        failed_requests = [r for r in requests if not r.success]
+        # Времена ответа успешных запросов - без поэлементного обхода в Python
+        response_times = all_response_times[success]
+        successful_count = int(response_times.size)
+        failed_count = total_requests - successful_count
         
-        total_requests = len(requests)
-        successful_count = len(successful_requests)
-        failed_count = len(failed_requests)
-        
-        # Среднее время ответа
-        avg_response_time = statistics.mean(response_times) if response_times else 0
-        
-        # P95 латенси
-        if response_times:
-            sorted_times = sorted(response_times)
-            p95_index = int(0.95 * len(sorted_times))
-            p95_latency = sorted_times[p95_index]
+        if successful_count:
+            # Среднее время ответа
+            avg_response_time = float(response_times.mean())
+            
+            # P95 латенси: элемент int(0.95 * n) отсортированной выборки, за O(n)
+            p95_index = int(0.95 * successful_count)
+            p95_latency = float(np.partition(response_times, p95_index)[p95_index])
         else:
+            avg_response_time = 0
             p95_latency = 0
         
         # Error rate
-        error_rate = (failed_count / total_requests * 100) if total_requests > 0 else 100
+        error_rate = failed_count / total_requests * 100
         
         # Обновление счетчика последовательных ошибок
         if failed_count > 0:
@@ -252,7 +465,7 @@ class ServiceMonitor:
             self.consecutive_failures = 0
         
         return ServiceMetrics(
-            timestamp=datetime.now(),
+            timestamp=timestamp,
             response_time_avg=avg_response_time,
             response_time_p95=p95_latency,
             error_rate=error_rate,
@@ -263,81 +476,92 @@ class ServiceMonitor:
             health_status=self.health_status
         )
     
-    def check_thresholds(self, metrics: ServiceMetrics) -> List[Dict]:
-        """Проверка метрик на превышение пороговых значений"""
+    def check_thresholds(self, metrics: ServiceMetrics) -> Tuple[List[Dict], str]:
+        """Проверка метрик на превышение пороговых значений
+        
+        Возвращает список алертов и общий статус ('normal', 'warning', 'critical').
+        Общий статус определяется временем ответа, error rate и последовательными ошибками.
+        """
         alerts = []
+        status = 0
         
         # Проверка времени ответа
-        if metrics.response_time_avg > self.config.thresholds.response_time_ms['critical']:
+        if metrics.response_time_avg > self._rt_crit:
             alerts.append({
                 'type': 'response_time',
                 'level': 'critical',
                 'message': f'Критическое время ответа: {metrics.response_time_avg:.2f}ms',
                 'value': metrics.response_time_avg,
-                'threshold': self.config.thresholds.response_time_ms['critical']
+                'threshold': self._rt_crit
             })
-        elif metrics.response_time_avg > self.config.thresholds.response_time_ms['warning']:
+            status = 2
+        elif metrics.response_time_avg > self._rt_warn:
             alerts.append({
                 'type': 'response_time',
                 'level': 'warning',
                 'message': f'Высокое время ответа: {metrics.response_time_avg:.2f}ms',
                 'value': metrics.response_time_avg,
-                'threshold': self.config.thresholds.response_time_ms['warning']
+                'threshold': self._rt_warn
             })
+            status = max(status, 1)
         
         # Проверка P95 латенси
-        if metrics.response_time_p95 > self.config.thresholds.p95_latency_ms['critical']:
+        if metrics.response_time_p95 > self._p95_crit:
             alerts.append({
                 'type': 'p95_latency',
                 'level': 'critical',
                 'message': f'Критическая P95 латенси: {metrics.response_time_p95:.2f}ms',
                 'value': metrics.response_time_p95,
-                'threshold': self.config.thresholds.p95_latency_ms['critical']
+                'threshold': self._p95_crit
             })
-        elif metrics.response_time_p95 > self.config.thresholds.p95_latency_ms['warning']:
+        elif metrics.response_time_p95 > self._p95_warn:
             alerts.append({
                 'type': 'p95_latency',
                 'level': 'warning',
                 'message': f'Высокая P95 латенси: {metrics.response_time_p95:.2f}ms',
                 'value': metrics.response_time_p95,
-                'threshold': self.config.thresholds.p95_latency_ms['warning']
+                'threshold': self._p95_warn
             })
         
         # Проверка error rate
-        if metrics.error_rate > self.config.thresholds.error_rate_percent['critical']:
+        if metrics.error_rate > self._er_crit:
             alerts.append({
                 'type': 'error_rate',
                 'level': 'critical',
                 'message': f'Критический error rate: {metrics.error_rate:.2f}%',
                 'value': metrics.error_rate,
-                'threshold': self.config.thresholds.error_rate_percent['critical']
+                'threshold': self._er_crit
             })
-        elif metrics.error_rate > self.config.thresholds.error_rate_percent['warning']:
+            status = 2
+        elif metrics.error_rate > self._er_warn:
             alerts.append({
                 'type': 'error_rate',
                 'level': 'warning',
                 'message': f'Высокий error rate: {metrics.error_rate:.2f}%',
                 'value': metrics.error_rate,
-                'threshold': self.config.thresholds.error_rate_percent['warning']
+                'threshold': self._er_warn
             })
+            status = max(status, 1)
         
         # Проверка последовательных ошибок
-        if metrics.consecutive_failures >= self.config.thresholds.consecutive_failures['critical']:
+        if metrics.consecutive_failures >= self._cf_crit:
             alerts.append({
                 'type': 'consecutive_failures',
                 'level': 'critical',
                 'message': f'Критическое количество последовательных ошибок: {metrics.consecutive_failures}',
                 'value': metrics.consecutive_failures,
-                'threshold': self.config.thresholds.consecutive_failures['critical']
+                'threshold': self._cf_crit
             })
-        elif metrics.consecutive_failures >= self.config.thresholds.consecutive_failures['warning']:
+            status = 2
+        elif metrics.consecutive_failures >= self._cf_warn:
             alerts.append({
                 'type': 'consecutive_failures',
                 'level': 'warning',
                 'message': f'Много последовательных ошибок: {metrics.consecutive_failures}',
                 'value': metrics.consecutive_failures,
-                'threshold': self.config.thresholds.consecutive_failures['warning']
+                'threshold': self._cf_warn
             })
+            status = max(status, 1)
         
         # Проверка health status
         if not metrics.health_status:
@@ -349,41 +573,28 @@ class ServiceMonitor:
                 'threshold': 1
             })
         
-        return alerts
+        return alerts, self._STATUS_NAMES[status]
     
     def should_alert(self, alert_type: str, level: str) -> bool:
         """Проверка необходимости отправки алерта (cooldown)"""
-        if not self.config.alerts.enabled:
+        if not self._alerts_enabled:
             return False
         
-        alert_key = f"{alert_type}_{level}"
-        now = datetime.now()
+        alert_key = (alert_type, level)
+        now = time.monotonic()
+        last = self._last_alert.get(alert_key)
         
-        if alert_key in self.last_alert_time:
-            time_since_last_alert = now - self.last_alert_time[alert_key]
-            cooldown = timedelta(minutes=self.config.alerts.cooldown_minutes)
-            
-            if time_since_last_alert < cooldown:
-                return False
+        if last is not None and now - last < self._cooldown_s:
+            return False
         
-        self.last_alert_time[alert_key] = now
+        self._last_alert[alert_key] = now
         return True
     
-    def log_metrics(self, metrics: ServiceMetrics):
+    def log_metrics(self, metrics: ServiceMetrics, overall_status: Optional[str] = None):
         """Логирование метрик"""
-        # Определение общего статуса
-        if metrics.error_rate > self.config.thresholds.error_rate_percent['critical']:
-            overall_status = 'critical'
-        elif (metrics.response_time_avg > self.config.thresholds.response_time_ms['critical'] or
-              metrics.consecutive_failures >= self.config.thresholds.consecutive_failures['critical']):
-            overall_status = 'critical'
-        elif metrics.error_rate > self.config.thresholds.error_rate_percent['warning']:
-            overall_status = 'warning'
-        elif (metrics.response_time_avg > self.config.thresholds.response_time_ms['warning'] or
-              metrics.consecutive_failures >= self.config.thresholds.consecutive_failures['warning']):
-            overall_status = 'warning'
-        else:
-            overall_status = 'normal'
+        # Общий статус обычно уже вычислен в check_thresholds
+        if overall_status is None:
+            _, overall_status = self.check_thresholds(metrics)
         
         # Логирование отдельных метрик
         self.logger.log_metric(
@@ -430,43 +641,45 @@ class ServiceMonitor:
             f"ER={metrics.error_rate:.2f}%, "
             f"CF={metrics.consecutive_failures}, "
             f"Health={'✅' if metrics.health_status else '❌'}",
-            extra=metrics.__dict__
+            extra={
+                'rt_avg': metrics.response_time_avg,
+                'rt_p95': metrics.response_time_p95,
+                'er': metrics.error_rate,
+                'cf': metrics.consecutive_failures,
+                'health': metrics.health_status
+            }
         )
     
     async def monitoring_cycle(self):
         """Один цикл мониторинга"""
-        self.logger.info(f"Начало цикла мониторинга: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        
-        requests = []
-        
-        # Проверка health endpoint
-        health_ok, health_response_time = await self.check_health()
+        # Единая временная метка цикла для всех его запросов и метрик
+        cycle_ts = datetime.now()
+        self._log_info("Начало цикла мониторинга: %s", cycle_ts.strftime('%Y-%m-%d %H:%M:%S'))
+        
+        self._reset_samples()
+        
+        # Проверка health endpoint параллельно с запросами-сэмплами
+        endpoint = self.endpoints['health']
+        health_task = asyncio.create_task(self.check_health())
+        samples = await self._gather_samples([
+            self._perform_get(endpoint, cycle_ts)
+            for _ in range(self.config.monitoring.samples_per_check - 1)
+        ])
+        health_ok, health_response_time = await health_task
         self.health_status = health_ok
         
-        requests.append(RequestMetrics(
-            endpoint=self.endpoints['health'],
-            response_time=health_response_time,
-            status_code=200 if health_ok else 500,
-            success=health_ok,
-            timestamp=datetime.now()
-        ))
-        
-        # Тестирование нескольких запросов
-        for _ in range(self.config.monitoring.samples_per_check - 1):
-            # Чередуем endpoints
-            endpoint = self.endpoints['health']
-            req_metrics = await self.perform_request(endpoint)
-            requests.append(req_metrics)
-            
-            # Небольшая задержка между запросами
-            await asyncio.sleep(0.5)
+        self._record_sample(health_response_time, health_ok)
+        for sample in samples:
+            self._record_sample(sample.response_time, sample.success)
         
         # Расчет метрик
-        metrics = self.calculate_metrics(requests)
+        metrics = self._cycle_metrics(cycle_ts)
         self.metrics_history.append(metrics)
+        await self._persist_metrics(metrics)
+        self._update_backoff(endpoint, failed=metrics.failed_requests > 0)
         
         # Проверка пороговых значений
-        alerts = self.check_thresholds(metrics)
+        alerts, overall_status = self.check_thresholds(metrics)
         
         # Логирование алертов
         for alert in alerts:
@@ -480,58 +693,85 @@ class ServiceMonitor:
                 )
         
         # Логирование метрик
-        self.log_metrics(metrics)
+        self.log_metrics(metrics, overall_status)
         
-        # Тестирование инференса (периодически)
-        current_minute = datetime.now().minute
-        if (self.config.inference_test.enabled and 
-            current_minute % self.config.monitoring.inference_test_interval_minutes == 0):
-            
-            self.logger.info("Запуск тестирования инференса...")
-            inference_ok, inference_time, result = await self.test_inference()
+        # Очистка старых данных
+        self._cleanup_old_data(cycle_ts)
+    
+    async def _inference_loop(self):
+        """Периодическое тестирование инференса в отдельной задаче"""
+        interval = self.config.monitoring.inference_test_interval_minutes * 60
+        while True:
+            try:
+                self._log_info("Запуск тестирования инференса...")
+                inference_ok, inference_time, result = await self.test_inference()
+                
+                if inference_ok:
+                    await self.logger.alog_metric(
+                        'inference_time',
+                        inference_time,
+                        status='normal'
+                    )
+                else:
+                    await self.logger.alog_metric(
+                        'inference_failure',
+                        1.0,
+                        status='critical'
+                    )
+                
+                # Изображение для следующего теста перечитывается в фоне при изменении файла
+                loop = asyncio.get_running_loop()
+                if not await loop.run_in_executor(None, self._refresh_test_image):
+                    self._log_warn(
+                        "Test image unavailable: %s, using the previously loaded copy",
+                        self.test_image_path
+                    )
             
-            if inference_ok:
-                self.logger.log_metric(
-                    'inference_time',
-                    inference_time,
-                    status='normal'
+            except Exception as e:
+                # Ошибка одной итерации не должна останавливать тестирование инференса
+                self._log_err(
+                    "Inference loop error: %s", e,
+                    extra={'error': str(e)}
                 )
-            else:
-                self.logger.log_metric(
-                    'inference_failure',
-                    1.0,
-                    status='critical'
-                )
-        
-        # Очистка старых данных
-        self._cleanup_old_data()
+            
+            await asyncio.sleep(interval)
     
-    def _cleanup_old_data(self):
+    def _cleanup_old_data(self, now: datetime):
         """Очистка старых метрик из истории"""
-        cutoff_time = datetime.now() - timedelta(hours=1)
+        # Размер ограничен maxlen; по времени удаляются только устаревшие записи с начала
+        cutoff_time = now - timedelta(hours=1)
         
-        self.request_history = [
-            r for r in self.request_history 
-            if r.timestamp > cutoff_time
-        ]
+        while self.request_history and self.request_history[0].timestamp <= cutoff_time:
+            self.request_history.popleft()
         
-        self.metrics_history = [
-            m for m in self.metrics_history
-            if m.timestamp > cutoff_time
-        ]
+        while self.metrics_history and self.metrics_history[0].timestamp <= cutoff_time:
+            self.metrics_history.popleft()
     
     async def start_monitoring(self):
         """Запуск непрерывного мониторинга"""
         self.logger.success(f"Запуск мониторинга сервиса: {self.base_url}")
         self.logger.info(f"Интервал проверки: {self.config.monitoring.check_interval_seconds} сек")
         
+        # Тест инференса идет в отдельной задаче со своим интервалом
+        inference_task = None
+        if self.config.inference_test.enabled:
+            inference_task = asyncio.create_task(self._inference_loop())
+        
         try:
             while True:
                 await self.monitoring_cycle()
-                await asyncio.sleep(self.config.monitoring.check_interval_seconds)
+                await asyncio.sleep(self._next_interval(self.endpoints['health']))
         
         except KeyboardInterrupt:
             self.logger.info("Мониторинг остановлен пользователем")
         
         except Exception as e:
             self.logger.error(f"Ошибка в мониторинге: {str(e)}", extra={'error': str(e)})
+        
+        finally:
+            try:
+                if inference_task is not None:
+                    inference_task.cancel()
+                    await asyncio.gather(inference_task, return_exceptions=True)
+            finally:
+                await self.aclose()
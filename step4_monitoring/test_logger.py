@@ -0,0 +1,51 @@
+import logging
+
+from src.logger import BufferedRotatingFileHandler, JsonFormatter
+
+
+def test_rotating_handler_limits_size_in_bytes(tmp_path):
+    """
+    Ротация по байтам, а не символам: кириллические записи не выводят файлы за maxBytes
+    """
+    log_file = tmp_path / "monitoring.log"
+    max_bytes = 2000
+    backup_count = 3
+
+    handler = BufferedRotatingFileHandler(
+        log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8'
+    )
+    handler.setFormatter(JsonFormatter())
+
+    logger = logging.getLogger('test_rotating_handler')
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(handler)
+
+    try:
+        for i in range(200):
+            logger.info("Начало цикла мониторинга, проверка связи № %d", i)
+    finally:
+        logger.removeHandler(handler)
+        handler.close()
+
+    files = sorted(p.name for p in tmp_path.iterdir())
+    assert files == ["monitoring.log"] + [f"monitoring.log.{i}" for i in range(1, backup_count + 1)]
+
+    for path in tmp_path.iterdir():
+        size = path.stat().st_size
+        assert 0 < size <= max_bytes, (path.name, size)
+
+
+def test_rotating_handler_skips_non_regular_files():
+    """
+    /dev/null и подобные файлы не ротируются (bpo-45401)
+    """
+    handler = BufferedRotatingFileHandler(
+        "/dev/null", maxBytes=10, backupCount=1, encoding='utf-8'
+    )
+    record = logging.LogRecord('test', logging.INFO, __file__, 1, "Сообщение", None, None)
+
+    try:
+        assert not handler.shouldRollover(record)
+    finally:
+        handler.close()
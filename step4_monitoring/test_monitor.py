@@ -0,0 +1,41 @@
+import logging
+
+from src.config import ConfigLoader
+from src.monitor import ServiceMonitor
+
+
+def test_history_rotation_limits_size_in_bytes(tmp_path, monkeypatch):
+    """
+    Ротация истории метрик: бэкапы циклически до backup_count, ни один файл не больше лимита
+    """
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "test_images").mkdir()
+    (tmp_path / "test_images" / "sample.jpg").write_bytes(b"\xff\xd8\xff\xd9")
+
+    backup_count = 2
+    config = ConfigLoader._create_config({
+        'logging': {'history_file': "logs/metrics_history.jsonl", 'backup_count': backup_count}
+    })
+    monitor = ServiceMonitor(config, logging.getLogger('test_monitor'))
+
+    max_bytes = 1000
+    monitor._history_max_bytes = max_bytes
+
+    # Пачки больше лимита из многобайтных (кириллических) записей
+    line = '{"сообщение":"проверка ротации истории метрик"}\n'.encode('utf-8')
+    try:
+        for _ in range(20):
+            monitor._write_history([line] * 20)
+    finally:
+        monitor._history_fp.close()
+
+    logs_dir = tmp_path / "logs"
+    files = sorted(p.name for p in logs_dir.iterdir())
+    assert files == ["metrics_history.jsonl"] + [
+        f"metrics_history.jsonl.{i}" for i in range(1, backup_count + 1)
+    ]
+
+    for path in logs_dir.iterdir():
+        data = path.read_bytes()
+        assert 0 < len(data) <= max_bytes, (path.name, len(data))
+        assert data.endswith(b"\n")